@@ -6,57 +6,79 @@ r"""Command line wrapper tool to generate RAL pkg using regtool as well as a cor
 fusesoc core file
 """
 import argparse
+import importlib.util
 import os
 import sys
+import traceback
 from textwrap import dedent as dedent
 
+# Tool modules already loaded in this process, keyed by tool name
+_tools = {}
 
-def main():
-    parser = argparse.ArgumentParser(
-        description=__doc__,
-        formatter_class=argparse.RawDescriptionHelpFormatter)
-    parser.add_argument("ip_name", metavar='<ip-name>', help='Name of the IP')
-    parser.add_argument(
-        "-t",
-        "--top",
-        default=False,
-        action='store_true',
-        help='Indicate whether the RAL model generation is for the top level')
-    parser.add_argument(
-        "csr_hjson",
-        metavar='<hjson-file>',
-        help='Input Hjson file capturing the CSR specification for the IP')
-    parser.add_argument(
-        '-o',
-        '--outdir',
-        default='.',
-        help=
-        'Target output directory for placing the RAL pkg as well as the fusesoc core file'
-    )
-    args = parser.parse_args()
 
+def load_tool(ral_tool_path, tool):
+    """Import a command line tool script from util/ as a module.
+
+    The script is loaded by path since util/topgen.py is shadowed by the
+    util/topgen package on the import path. Loaded modules are cached so batch
+    runs only pay the import cost once.
+    """
+    if tool in _tools:
+        return _tools[tool]
+    if ral_tool_path not in sys.path:
+        sys.path.insert(0, ral_tool_path)
+    spec = importlib.util.spec_from_file_location(
+        tool + "_tool", os.path.join(ral_tool_path, tool + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _tools[tool] = module
+    return module
+
+
+def generate_one(ip_name, csr_hjson, outdir, top):
+    """Generate the RAL pkg and fusesoc core file for a single IP.
+
+    Returns 0 on success or if the Hjson spec does not exist, 1 on error.
+    """
     # check if csr_hjson is a valid file
-    if not os.path.exists(args.csr_hjson):
-        print("RAL Hjson spec file " + args.csr_hjson + " does not exist!" + \
-              "\nExitting without error.")
-        sys.exit(0)
+    if not os.path.exists(csr_hjson):
+        print("RAL Hjson spec file " + csr_hjson + " does not exist!")
+        return 0
 
     # check if outdir exists
-    if not os.path.exists(args.outdir):
-        print("ERROR: Outdir " + args.outdir + " does not exist! Create it first." + \
-              "\nExitting with error.")
-        sys.exit(1)
+    if not os.path.exists(outdir):
+        print("ERROR: Outdir " + outdir + " does not exist! Create it first.",
+              file=sys.stderr)
+        return 1
 
     # generate the ral pkg
     self_path = os.path.dirname(os.path.realpath(__file__))
     ral_tool_path = os.path.abspath(os.path.join(self_path, "../../../util"))
 
-    if args.top:
-        os.system(ral_tool_path + "/topgen.py -r -o " + args.outdir + ' -t ' +
-                  args.csr_hjson)
+    # run the tool in-process rather than paying for a fresh interpreter
+    if top:
+        tool_main = load_tool(ral_tool_path, "topgen").main
+        tool_args = ["-r", "-o", outdir, "-t", csr_hjson]
     else:
-        os.system(ral_tool_path + "/regtool.py -s -t " + args.outdir + ' ' +
-                  args.csr_hjson)
+        tool_main = load_tool(ral_tool_path, "regtool").main
+        tool_args = ["-s", "-t", outdir, csr_hjson]
+
+    try:
+        status = tool_main(tool_args)
+    except SystemExit as e:
+        # topgen exits explicitly once the hjson / RAL model is generated
+        status = e.code
+    except Exception:
+        # a crash in the tool fails this IP only
+        traceback.print_exc()
+        status = 1
+
+    # don't write a core file pointing at a RAL pkg that was not generated
+    if status not in (None, 0):
+        reason = "" if isinstance(status, int) else ": " + str(status)
+        print("ERROR: " + ip_name + " (" + csr_hjson + ") RAL pkg generation failed" + \
+              reason, file=sys.stderr)
+        return 1
 
     # create fusesoc core file
     text = """
@@ -80,15 +102,104 @@ def main():
              default:
                filesets:
                  - files_dv
-           """ % (args.ip_name.upper(), args.ip_name)
+           """ % (ip_name.upper(), ip_name)
     text = dedent(text).strip()
 
-    with open(args.outdir + "/" + "gen_ral_pkg.core", 'w') as fout:
+    with open(outdir + "/" + "gen_ral_pkg.core", 'w') as fout:
         try:
             fout.write(text)
         except IOError:
             log.error(exceptions.text_error_template().render())
 
+    return 0
+
+
+def read_batch(batch_file, default_outdir):
+    """Read a batch file into a list of (ip_name, csr_hjson, outdir) tuples.
+
+    Each line holds `<ip-name> <hjson-file> [<outdir>]`, the outdir defaulting
+    to the one given on the command line. Every IP writes a gen_ral_pkg.core
+    file, so each outdir may only be used by one line. Empty lines and lines
+    starting with '#' are skipped.
+    """
+    rows = []
+    outdirs = set()
+    with open(batch_file, 'r') as fin:
+        for lineno, line in enumerate(fin, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            if len(fields) not in (2, 3):
+                print("ERROR: " + batch_file + ":" + str(lineno) +
+                      ": expected '<ip-name> <hjson-file> [<outdir>]'" + \
+                      "\nExitting with error.",
+                      file=sys.stderr)
+                sys.exit(1)
+            if len(fields) == 2:
+                fields.append(default_outdir)
+            outdir = os.path.realpath(fields[2])
+            if outdir in outdirs:
+                print("ERROR: " + batch_file + ":" + str(lineno) +
+                      ": outdir " + fields[2] + " is already used by another line" + \
+                      "\nExitting with error.",
+                      file=sys.stderr)
+                sys.exit(1)
+            outdirs.add(outdir)
+            rows.append(tuple(fields))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ip_name",
+                        nargs='?',
+                        metavar='<ip-name>',
+                        help='Name of the IP')
+    parser.add_argument(
+        "-t",
+        "--top",
+        default=False,
+        action='store_true',
+        help='Indicate whether the RAL model generation is for the top level')
+    parser.add_argument(
+        "csr_hjson",
+        nargs='?',
+        metavar='<hjson-file>',
+        help='Input Hjson file capturing the CSR specification for the IP')
+    parser.add_argument(
+        '-o',
+        '--outdir',
+        default='.',
+        help=
+        'Target output directory for placing the RAL pkg as well as the fusesoc core file'
+    )
+    parser.add_argument(
+        '-b',
+        '--batch',
+        metavar='<batch-file>',
+        help=
+        'File listing "<ip-name> <hjson-file> [<outdir>]" per line to generate '
+        'the RAL pkgs of many IPs in a single run. <outdir> defaults to '
+        '--outdir and must be different for every line. Failing IPs are reported '
+        'and skipped; the run exits with error once all lines are processed')
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.ip_name or args.csr_hjson:
+            parser.error("<ip-name> and <hjson-file> cannot be used with --batch")
+        rows = read_batch(args.batch, args.outdir)
+    elif args.ip_name and args.csr_hjson:
+        rows = [(args.ip_name, args.csr_hjson, args.outdir)]
+    else:
+        parser.error("<ip-name> and <hjson-file> are required without --batch")
+
+    status = 0
+    for ip_name, csr_hjson, outdir in rows:
+        status |= generate_one(ip_name, csr_hjson, outdir, args.top)
+    sys.exit(status)
+
 
 if __name__ == '__main__':
     main()
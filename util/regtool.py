@@ -28,7 +28,7 @@ USAGE = '''
 '''
 
 
-def main():
+def main(argv=None):
     format = 'hjson'
     verbose = 0
 
@@ -100,7 +100,7 @@ def main():
                         action='store_true',
                         help='Skip validate, just output json')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.version:
         version.show_and_exit(__file__, ["Hjson", "Mako"])
@@ -221,7 +221,9 @@ def main():
                 gen_json.gen_json(obj, outfile, format)
 
             outfile.write('\n')
+    else:
+        return 1
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -352,7 +352,7 @@ def generate_top_ral(top, ip_objs, out_path):
     gen_dv.gen_ral(top_block, str(out_path))
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(prog="topgen")
     parser.add_argument('--topcfg',
                         '-t',
@@ -422,7 +422,7 @@ def main():
         action='store_true',
         help="If set, the tool generates top level RAL model for DV")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # check combinations
     if args.top_ral:
@@ -437,13 +437,13 @@ def main():
                                args.plic_only or args.alert_handler_only):
         log.error(
             "'no' series options cannot be used with 'only' series options")
-        raise SystemExit(sys.exc_info()[1])
+        raise SystemExit(1)
 
     if not (args.hjson_only or args.plic_only or args.alert_handler_only or
             args.tpl):
         log.error(
             "Template file can be omitted only if '--hjson-only' is true")
-        raise SystemExit(sys.exc_info()[1])
+        raise SystemExit(1)
 
     if args.verbose:
         log.basicConfig(format="%(levelname)s: %(message)s", level=log.DEBUG)
@@ -455,7 +455,7 @@ def main():
         log.info("TOP directory not given. Use %s", (outdir))
     elif not Path(args.outdir).is_dir():
         log.error("'--outdir' should point to writable directory")
-        raise SystemExit(sys.exc_info()[1])
+        raise SystemExit(1)
     else:
         outdir = Path(args.outdir)
 